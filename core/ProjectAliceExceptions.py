@@ -141,6 +141,10 @@ class PlayBytesStopped(ProjectAliceException):
 	pass  # Raised for capture only
 
 
+class DecoderStartFailed(ProjectAliceException):
+	pass  # Raised for capture only
+
+
 class VitalConfigMissing(ProjectAliceException):
 
 	def __init__(self, message: str = None):
@@ -33,6 +33,7 @@ class ASRManager(Manager):
 	def onStop(self):
 		if self._asr:
 			self._asr.onStop()
+			self._asr.freeResources()
 
 
 	def _startASREngine(self, forceAsr = None):
@@ -88,6 +89,16 @@ class ASRManager(Manager):
 			self._startASREngine(forceAsr=fallback)
 
 
+	def _restartASREngine(self):
+		previousAsr = self._asr
+		previousAsr.onStop()
+		self._startASREngine()
+
+		# The same Asr class may keep its resources warm, anything else, even a reloaded class, frees them
+		if type(self._asr) is not type(previousAsr):
+			previousAsr.freeResources()
+
+
 	@property
 	def asr(self) -> Asr:
 		return self._asr
@@ -99,15 +110,13 @@ class ASRManager(Manager):
 
 		if not self._asr.isOnlineASR:
 			self.logInfo('Connected to internet, switching Asr')
-			self._asr.onStop()
-			self._startASREngine()
+			self._restartASREngine()
 
 
 	def onInternetLost(self):
 		if self._asr.isOnlineASR:
 			self.logInfo('Internet lost, switching to offline Asr')
-			self._asr.onStop()
-			self._startASREngine()
+			self._restartASREngine()
 
 
 	def onStartListening(self, session: DialogSession):
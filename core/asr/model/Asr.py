@@ -43,6 +43,11 @@ class Asr(ProjectAliceObject):
 		self._timeout.set()
 
 
+	def freeResources(self):
+		# Called once another Asr took over or Alice goes down, for whatever an Asr keeps warm across restarts
+		pass
+
+
 	def decodeFile(self, filepath: Path, session: DialogSession):
 		# We do not yet use decode file, but might at one point
 		pass
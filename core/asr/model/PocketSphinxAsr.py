@@ -1,8 +1,14 @@
+import multiprocessing
+import os
+import queue
 import shutil
+import signal
 import tarfile
+import threading
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
+from core.ProjectAliceExceptions import DecoderStartFailed
 from core.asr.model.ASRResult import ASRResult
 from core.asr.model.Asr import Asr
 from core.asr.model.Recorder import Recorder
@@ -10,12 +16,241 @@ from core.commons import constants
 from core.dialog.model.DialogSession import DialogSession
 from core.util.Stopwatch import Stopwatch
 
+MODEL_PATH: Optional[Path] = None
+
 try:
+	import pocketsphinx
 	from pocketsphinx import Decoder
+
+	# Wherever pip installed pocketsphinx, independently of the python version
+	MODEL_PATH = Path(pocketsphinx.__file__).parent / 'model'
 except:
 	pass
 
 
+def _decoderWorker(config: Dict[str, str], inbox, outbox):
+	"""
+	Holds a warm decoder, so that concurrent sessions do not share one. Answers None once the decoder is loaded, or
+	the error message if it could not be. Audio batches are then answered with (inSpeech, hypothesis, likelihood),
+	'end' closes the utterance and answers with the final hypothesis. None stops the worker
+	"""
+	try:
+		decoderConfig = Decoder.default_config()
+		for key, value in config.items():
+			decoderConfig.set_string(key, value)
+		decoder = Decoder(decoderConfig)
+	except Exception as e:
+		outbox.put(str(e) or type(e).__name__)
+		return
+
+	outbox.put(None)
+
+	while True:
+		message = inbox.get()
+		if message is None:
+			break
+
+		if message == 'start':
+			decoder.start_utt()
+			continue
+
+		if message == 'end':
+			decoder.end_utt()
+			hypothesis = decoder.hyp()
+			outbox.put((False, hypothesis.hypstr, hypothesis.prob) if hypothesis else (False, None, 0))
+			continue
+
+		decoder.process_raw(message, False, False)
+		inSpeech = decoder.get_in_speech()
+		hypothesis = decoder.hyp()
+		outbox.put((inSpeech, hypothesis.hypstr, hypothesis.prob) if hypothesis else (inSpeech, None, 0))
+
+
+def availableCpus() -> List[int]:
+	"""
+	The cpus Alice is allowed to run on, which can be less than the machine has when limited by affinity or cgroups
+	"""
+	if hasattr(os, 'sched_getaffinity'):
+		return sorted(os.sched_getaffinity(0))
+
+	return list(range(os.cpu_count() or 1))
+
+
+def _forkedDecoderWorker(config: Dict[str, str], cpu: int, inbox, outbox):
+	"""
+	Entry point of the forked worker processes, so the decoder does not hold Alice's GIL.
+	Forking from threaded Alice is safe here as the child only runs the decoder loop: it never logs nor touches
+	anything guarded by a lock another thread could have held at fork time. Alice's own signal handlers are dropped,
+	the main process handles the shutdown and terminates its daemon workers
+	"""
+	signal.signal(signal.SIGINT, signal.SIG_IGN)
+	signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+	if hasattr(os, 'sched_setaffinity'):
+		try:
+			os.sched_setaffinity(0, {cpu})
+		except OSError:
+			pass
+
+	_decoderWorker(config, inbox, outbox)
+
+
+class DecoderWorker:
+	"""
+	Main process side of a decoder worker. Uses a forked process when possible, a thread otherwise
+	"""
+
+	# Seconds a worker gets to load the models
+	STARTUP_TIMEOUT = 60
+
+
+	def __init__(self, config: Dict[str, str], cpu: int = 0):
+		self._cpu = cpu
+		if 'fork' in multiprocessing.get_all_start_methods():
+			context = multiprocessing.get_context('fork')
+			self._inbox = context.Queue()
+			self._outbox = context.Queue()
+			self._worker = context.Process(target=_forkedDecoderWorker, args=(config, cpu, self._inbox, self._outbox), daemon=True)
+		else:
+			self._inbox = queue.Queue()
+			self._outbox = queue.Queue()
+			self._worker = threading.Thread(target=_decoderWorker, args=(config, self._inbox, self._outbox), daemon=True)
+
+		self._worker.start()
+
+		try:
+			error = self._outbox.get(timeout=self.STARTUP_TIMEOUT)
+		except queue.Empty:
+			error = 'Timed out loading the models'
+
+		if error:
+			self.stop()
+			raise DecoderStartFailed(f'Pocketsphinx decoder failed to start: {error}')
+
+
+	@property
+	def isAlive(self) -> bool:
+		return self._worker.is_alive()
+
+
+	@property
+	def cpu(self) -> int:
+		return self._cpu
+
+
+	def send(self, message: Union[str, bytes]):
+		self._inbox.put(message)
+
+
+	def receive(self, timeout: float) -> Tuple[bool, Optional[str], float]:
+		return self._outbox.get(timeout=timeout)
+
+
+	def poll(self) -> Optional[Tuple[bool, Optional[str], float]]:
+		try:
+			return self._outbox.get(block=False)
+		except queue.Empty:
+			return None
+
+
+	def stop(self):
+		if not self._worker.is_alive():
+			return
+
+		self._inbox.put(None)
+		self._worker.join(timeout=2)
+
+		if self._worker.is_alive() and isinstance(self._worker, multiprocessing.process.BaseProcess):
+			self._worker.terminate()
+
+
+class DecoderWorkerPool:
+	"""
+	Warm decoder workers for one configuration. Sessions check a worker out for their whole duration
+	"""
+
+	def __init__(self, config: Dict[str, str], maxWorkers: Optional[int] = None):
+		"""
+		:param config: The decoder configuration
+		:param maxWorkers: Defaults to one worker per available cpu, and never more than that
+		"""
+		self._config = config
+		cpus = availableCpus()
+		# Each worker is pinned to its own cpu, taken from here on spawn and given back on discard
+		self._freeCpus = set(cpus[:maxWorkers] if maxWorkers else cpus)
+		self._workers = queue.Queue()
+		self._lock = threading.Lock()
+		self._stopped = False
+
+		# Warm up one decoder right away, others are spawned on demand when sessions run concurrently
+		self.release(self._newWorker())
+
+
+	@property
+	def config(self) -> Dict[str, str]:
+		return self._config
+
+
+	def _newWorker(self) -> Optional[DecoderWorker]:
+		with self._lock:
+			if self._stopped or not self._freeCpus:
+				return None
+
+			cpu = min(self._freeCpus)
+			self._freeCpus.remove(cpu)
+
+		# Loading the models takes a while, do not hold the lock meanwhile
+		try:
+			return DecoderWorker(config=self._config, cpu=cpu)
+		except Exception:
+			with self._lock:
+				self._freeCpus.add(cpu)
+			raise
+
+
+	def acquire(self, timeout: float) -> DecoderWorker:
+		"""
+		Get an idle worker, spawning one if none is idle and the pool is not full
+		:param timeout: Seconds to wait for a worker to be released when the pool is full
+		:raises queue.Empty: if no worker was released in time, or the pool is stopped
+		"""
+		if self._stopped:
+			raise queue.Empty
+
+		try:
+			return self._workers.get(block=False)
+		except queue.Empty:
+			return self._newWorker() or self._workers.get(timeout=timeout)
+
+
+	def release(self, worker: DecoderWorker):
+		# Checked and put under the lock, so a concurrent stop cannot miss this worker
+		with self._lock:
+			if not self._stopped:
+				self._workers.put(worker)
+				return
+
+		worker.stop()
+
+
+	def discard(self, worker: DecoderWorker):
+		with self._lock:
+			self._freeCpus.add(worker.cpu)
+
+		worker.stop()
+
+
+	def stop(self):
+		with self._lock:
+			self._stopped = True
+			workers = list()
+			while not self._workers.empty():
+				workers.append(self._workers.get(block=False))
+
+		for worker in workers:
+			worker.stop()
+
+
 class PocketSphinxAsr(Asr):
 	NAME = 'Pocketsphinx Asr'
 	DEPENDENCIES = {
@@ -34,13 +269,25 @@ class PocketSphinxAsr(Asr):
 		f'{constants.GITHUB_URL}/cmusphinx-models/blob/master/%lang%/cmudict-%lang%.dict'
 	}
 
+	# Audio is coalesced into batches of this many bytes before being fed to the decoder, ~250ms at 16kHz mono 16 bits
+	BATCH_SIZE = 8192
+	# Seconds to wait on a decoder worker before considering it dead
+	WORKER_TIMEOUT = 10
+	# Batches sent to the decoder worker that may still be waiting for an answer before capture blocks on it
+	MAX_PENDING_BATCHES = 1
+
+	# Decoder configurations, per language, shared by all instances
+	_cachedConfigs: Dict[str, Dict[str, str]] = dict()
+	# Decoder workers survive Asr restarts, so that switching back and forth does not reload the models
+	_pool: Optional[DecoderWorkerPool] = None
+	_poolLock = threading.Lock()
+
 
 	def __init__(self):
 		super().__init__()
 		self._capableOfArbitraryCapture = True
 		self._isOnlineASR = False
-		self._decoder: Optional[Decoder] = None
-		self._config = None
+		self._config: Dict[str, str] = dict()
 
 
 	def onStart(self):
@@ -49,42 +296,48 @@ class PocketSphinxAsr(Asr):
 		if not self.checkLanguage():
 			self.downloadLanguage()
 
-		self._config = Decoder.default_config()
-		self._config.set_string('-hmm', f'{self.Commons.rootDir()}/venv/lib/python3.7/site-packages/pocketsphinx/model/{self.LanguageManager.activeLanguageAndCountryCode.lower()}')
-		self._config.set_string('-lm', f'{self.Commons.rootDir()}/venv/lib/python3.7/site-packages/pocketsphinx/model/{self.LanguageManager.activeLanguageAndCountryCode.lower()}.lm.bin')
-		self._config.set_string('-dict', f'{self.Commons.rootDir()}/venv/lib/python3.7/site-packages/pocketsphinx/model/cmudict-{self.LanguageManager.activeLanguageAndCountryCode.lower()}.dict')
-		self._decoder = Decoder(self._config)
+		language = self.LanguageManager.activeLanguageAndCountryCode.lower()
+		if language not in self._cachedConfigs:
+			self._cachedConfigs[language] = {
+				'-hmm' : str(MODEL_PATH / language),
+				'-lm'  : str(MODEL_PATH / f'{language}.lm.bin'),
+				'-dict': str(MODEL_PATH / f'cmudict-{language}.dict')
+			}
+
+		self._config = self._cachedConfigs[language]
+
+		with PocketSphinxAsr._poolLock:
+			if PocketSphinxAsr._pool and PocketSphinxAsr._pool.config == self._config:
+				self.logInfo('Reusing warm decoders')
+				return
+
+			if PocketSphinxAsr._pool:
+				PocketSphinxAsr._pool.stop()
+				PocketSphinxAsr._pool = None
+
+			# Raises if the decoder cannot load, so that the Asr manager falls back to another Asr
+			PocketSphinxAsr._pool = DecoderWorkerPool(config=self._config)
 
 
 	def checkLanguage(self) -> bool:
-		if not Path(self.Commons.rootDir(), f'venv/lib/python3.7/site-packages/pocketsphinx/model/{self.LanguageManager.activeLanguageAndCountryCode.lower()}').exists():
+		if not (MODEL_PATH / self.LanguageManager.activeLanguageAndCountryCode.lower()).exists():
 			self.logInfo('Missing language model')
 			return False
 
 		return True
 
 
-	def timeout(self):
-		super().timeout()
-		try:
-			self._decoder.end_utt()
-		except:
-			# If this fails we don't care, at least we tried to close the utterance
-			pass
-
-
 	def downloadLanguage(self) -> bool:
 		self.logInfo(f'Downloading language model for "{self.LanguageManager.activeLanguage}"')
 
-		venv = Path(self.Commons.rootDir(), 'venv/lib/python3.7/site-packages/pocketsphinx/')
 		for url in self.LANGUAGE_PACK:
 			url = url.replace('%lang%', self.LanguageManager.activeLanguageAndCountryCode.lower())
 			filename = Path(url).name
-			download = Path(venv, 'model', filename)
+			download = Path(MODEL_PATH, filename)
 			self.Commons.downloadFile(url=f'{url}?raw=true', dest=str(download))
 
 			if download.suffix == '.tar':
-				dest = Path(venv, 'model', self.LanguageManager.activeLanguageAndCountryCode.lower())
+				dest = Path(MODEL_PATH, self.LanguageManager.activeLanguageAndCountryCode.lower())
 
 				if dest.exists():
 					shutil.rmtree(dest)
@@ -98,40 +351,99 @@ class PocketSphinxAsr(Asr):
 		return True
 
 
+	def _endUtterance(self, worker: DecoderWorker, pending: int) -> Tuple[Optional[str], float]:
+		worker.send('end')
+		# Replies come in order, skip those of the batches still in flight
+		for _ in range(pending):
+			worker.receive(timeout=self.WORKER_TIMEOUT)
+
+		_, text, likelihood = worker.receive(timeout=self.WORKER_TIMEOUT)
+		return text, likelihood
+
+
+	def freeResources(self):
+		super().freeResources()
+		# type(self), as a reloaded module has its own class, with its own pool
+		with type(self)._poolLock:
+			if type(self)._pool:
+				type(self)._pool.stop()
+				type(self)._pool = None
+
+
+	def _decode(self, worker: DecoderWorker, session: DialogSession, audioStream: Iterable[bytes], processingTime: Stopwatch) -> Optional[Tuple[str, float]]:
+		worker.send('start')
+		inSpeech = False
+		speechEnded = False
+		pending = 0
+		buffer = bytearray()
+		for chunk in audioStream:
+			if self._timeout.isSet():
+				break
+
+			buffer.extend(chunk)
+			if len(buffer) >= self.BATCH_SIZE:
+				worker.send(bytes(buffer))
+				buffer.clear()
+				pending += 1
+
+			# Handle the decoder answers as soon as they exist, with every chunk, not only once the next batch is full.
+			# Only wait on the decoder when it lags behind, otherwise keep capturing while it works
+			while pending:
+				reply = worker.receive(timeout=self.WORKER_TIMEOUT) if pending > self.MAX_PENDING_BATCHES else worker.poll()
+				if not reply:
+					break
+
+				pending -= 1
+				speaking, text, likelihood = reply
+				if text:
+					self.partialTextCaptured(session, text, likelihood, processingTime.time)
+
+				if speaking != inSpeech:
+					inSpeech = speaking
+					if not inSpeech:
+						speechEnded = True
+						break
+
+			if speechEnded:
+				break
+
+		# Always close the utterance, so the worker is clean for the next session
+		text, likelihood = self._endUtterance(worker, pending)
+		return (text, likelihood) if speechEnded and text else None
+
+
 	def decodeStream(self, session: DialogSession) -> Optional[ASRResult]:
 		super().decodeStream(session)
 
 		result = None
-		counter = 0
+		pool = self._pool
 		with Stopwatch() as processingTime:
 			with Recorder(self._timeout, session.user, session.siteId) as recorder:
 				self.ASRManager.addRecorder(session.siteId, recorder)
 				self._recorder = recorder
-				self._decoder.start_utt()
-				inSpeech = False
-				for chunk in recorder:
-					if self._timeout.isSet():
-						break
 
-					self._decoder.process_raw(chunk, False, False)
-					hypothesis = self._decoder.hyp()
-					if hypothesis:
-						counter += 1
-						if counter == 10:
-							self.partialTextCaptured(session, hypothesis.hypstr, hypothesis.prob, processingTime.time)
-							counter = 0
-					if self._decoder.get_in_speech() != inSpeech:
-						inSpeech = self._decoder.get_in_speech()
-						if not inSpeech:
-							self._decoder.end_utt()
-							result = self._decoder.hyp() if self._decoder.hyp() else None
-							break
+				worker = None
+				released = False
+				try:
+					worker = pool.acquire(timeout=self.WORKER_TIMEOUT)
+					# audioStream flushes everything captured while the decoder was busy as a single chunk
+					result = self._decode(worker, session, recorder.audioStream(), processingTime)
+					pool.release(worker)
+					released = True
+				except queue.Empty:
+					self.logError('No Pocketsphinx decoder worker available or answering')
+				except Exception as e:
+					self.logError(f'Pocketsphinx decoding failed: {e}')
+				finally:
+					# A worker left in an unknown state by a failure cannot be trusted for the next session
+					if worker and not released:
+						pool.discard(worker)
 
 				self.end()
 
 		return ASRResult(
-			text=result.hypstr.strip(),
+			text=result[0].strip(),
 			session=session,
-			likelihood=self._decoder.hyp().prob,
+			likelihood=result[1],
 			processingTime=processingTime.time
 		) if result else None
@@ -19,6 +19,7 @@ class Recorder(ProjectAliceObject):
 		self._recording = False
 		self._timeoutFlag = timeoutFlag
 		self._buffer = queue.Queue()
+		self._recordAudio = False
 
 
 	def __enter__(self):
@@ -40,6 +41,8 @@ class Recorder(ProjectAliceObject):
 
 
 	def startRecording(self):
+		# Read once per recording, audio frames are handled many times a second
+		self._recordAudio = self.ConfigManager.getAliceConfigByName('recordAudioAfterWakeword')
 		self._recording = True
 
 
@@ -56,7 +59,7 @@ class Recorder(ProjectAliceObject):
 					while frame:
 						self._buffer.put(frame)
 
-						if self.ConfigManager.getAliceConfigByName('recordAudioAfterWakeword'):
+						if self._recordAudio:
 							self.AudioServer.recordFrame(siteId, frame)
 
 						frame = wav.readframes(512)
@@ -223,6 +223,33 @@ class ConfigManager(Manager):
 				self.Commons.runRootSystemCommand(['systemctl', 'restart', 'snips-nlu'])
 
 
+	def updateSnipsConfigurations(self, parent: str, values: dict, restartSnips: bool = False, createIfNotExist: bool = True):
+		"""
+		Setting multiple configs of a same parent in snips.toml, writing the file only once
+		:param parent: Parent key in toml
+		:param values: Dict of keys in that parent key and the values to set
+		:param restartSnips: Whether to restart Snips or not after changing the values
+		:param createIfNotExist: If the parent key or the keys don't exist do create them
+		"""
+
+		changed = False
+		for key, value in values.items():
+			if key not in self._snipsConfigurations[parent] and not createIfNotExist:
+				self.logWarning(f'Tried to set **{parent}/{key}** in snips configuration but key was not found')
+				continue
+
+			self._snipsConfigurations[parent][key] = value
+			changed = True
+
+		if not changed:
+			return
+
+		self._snipsConfigurations.dump()
+
+		if restartSnips:
+			self.Commons.runRootSystemCommand(['systemctl', 'restart', 'snips-nlu'])
+
+
 	def getSnipsConfiguration(self, parent: str, key: str, createIfNotExist: bool = True) -> typing.Optional[str]:
 		"""
 		Getting a specific configuration from snips.toml
@@ -422,10 +449,17 @@ class ConfigManager(Manager):
 
 
 	def updateMqttSettings(self):
-		self.ConfigManager.updateSnipsConfiguration('snips-common', 'mqtt', f'{self.getAliceConfigByName("mqttHost")}:{self.getAliceConfigByName("mqttPort"):}', False, False)
-		self.ConfigManager.updateSnipsConfiguration('snips-common', 'mqtt_username', self.getAliceConfigByName('mqttHost'), False, False)
-		self.ConfigManager.updateSnipsConfiguration('snips-common', 'mqtt_password', self.getAliceConfigByName('mqttHost'), False, False)
-		self.ConfigManager.updateSnipsConfiguration('snips-common', 'mqtt_tls_cafile', self.getAliceConfigByName('mqttHost'), True, False)
+		self.updateSnipsConfigurations(
+			parent='snips-common',
+			values={
+				'mqtt'           : f'{self.getAliceConfigByName("mqttHost")}:{self.getAliceConfigByName("mqttPort"):}',
+				'mqtt_username'  : self.getAliceConfigByName('mqttHost'),
+				'mqtt_password'  : self.getAliceConfigByName('mqttHost'),
+				'mqtt_tls_cafile': self.getAliceConfigByName('mqttHost')
+			},
+			restartSnips=True,
+			createIfNotExist=False
+		)
 		self.reconnectMqtt()
 
 
@@ -14,6 +14,9 @@ class SkillStoreManager(Manager):
 	def __init__(self):
 		super().__init__()
 		self._skillStoreData = dict()
+		self._session = requests.Session()
+		self._storeEtag: Optional[str] = None
+		self._storeChannel: Optional[str] = None
 
 
 	@property
@@ -25,6 +28,11 @@ class SkillStoreManager(Manager):
 		self.refreshStoreData()
 
 
+	def onStop(self):
+		super().onStop()
+		self._session.close()
+
+
 	@Online(catchOnly=True)
 	def onQuarterHour(self):
 		self.refreshStoreData()
@@ -32,11 +40,15 @@ class SkillStoreManager(Manager):
 
 	def refreshStoreData(self):
 		updateChannel = self.ConfigManager.getAliceConfigByName('skillsUpdateChannel')
-		req = requests.get(url=f'https://skills.projectalice.io/assets/store/{updateChannel}.json')
-		if req.status_code not in {200, 304}:
+		# Only ask for the store data if it changed since our last download of that channel
+		headers = {'If-None-Match': self._storeEtag} if self._storeEtag and updateChannel == self._storeChannel else None
+		req = self._session.get(url=f'https://skills.projectalice.io/assets/store/{updateChannel}.json', headers=headers)
+		if req.status_code != 200:
 			return
 
 		self._skillStoreData = req.json()
+		self._storeEtag = req.headers.get('ETag')
+		self._storeChannel = updateChannel
 
 
 	def _getSkillUpdateVersion(self, skillName: str) -> Optional[tuple]:
@@ -28,6 +28,9 @@ from core.dialog.model.DialogSession import DialogSession
 class CommonsManager(Manager):
 
 	ERROR_HANDLER_FUNC = CFUNCTYPE(None, c_char_p, c_int, c_char_p, c_int, c_char_p)
+	# Bytes written to disk at a time when streaming a download
+	DOWNLOAD_CHUNK_SIZE = 65536
+
 
 	def __init__(self):
 		super().__init__(name='Commons')
@@ -306,7 +309,7 @@ class CommonsManager(Manager):
 			with requests.get(url, stream=True) as r:
 				r.raise_for_status()
 				with Path(dest).open('wb') as fp:
-					for chunk in r.iter_content(chunk_size=8192):
+					for chunk in r.iter_content(chunk_size=self.DOWNLOAD_CHUNK_SIZE):
 						if chunk:
 							fp.write(chunk)
 			return True
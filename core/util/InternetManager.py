@@ -10,6 +10,8 @@ class InternetManager(Manager):
 	def __init__(self):
 		super().__init__()
 		self._online = False
+		# Keep the connection alive between the checks instead of a new handshake every minute
+		self._session = requests.Session()
 
 
 	def onStart(self):
@@ -20,6 +22,11 @@ class InternetManager(Manager):
 			self.logInfo('Configurations set to stay completly offline')
 
 
+	def onStop(self):
+		super().onStop()
+		self._session.close()
+
+
 	@property
 	def online(self) -> bool:
 		return self._online
@@ -36,7 +43,7 @@ class InternetManager(Manager):
 
 	def checkOnlineState(self, addr: str = 'https://clients3.google.com/generate_204', silent: bool = False) -> bool:
 		try:
-			online = requests.get(addr).status_code == 204
+			online = self._session.get(addr).status_code == 204
 		except RequestException:
 			online = False
 
@@ -1,4 +1,6 @@
 import re
+import shutil
+from contextlib import closing
 
 from core.dialog.model.DialogSession import DialogSession
 from core.user.model.User import User
@@ -241,7 +243,8 @@ class AmazonTts(Tts):
 				self.logError(f'[{self.TTS.value}] Failed downloading speech file')
 				return
 
-			tmpFile.write_bytes(response['AudioStream'].read())
+			with closing(response['AudioStream']) as stream, tmpFile.open('wb') as fp:
+				shutil.copyfileobj(stream, fp, self.Commons.DOWNLOAD_CHUNK_SIZE)
 
 			self._mp3ToWave(src=tmpFile, dest=self._cacheFile)
 			tmpFile.unlink()
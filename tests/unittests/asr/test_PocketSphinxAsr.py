@@ -0,0 +1,294 @@
+import queue
+import unittest
+from unittest import mock
+from unittest.mock import MagicMock
+
+from core.ProjectAliceExceptions import DecoderStartFailed
+from core.asr.model.PocketSphinxAsr import DecoderWorker, DecoderWorkerPool, PocketSphinxAsr
+from core.util.Stopwatch import Stopwatch
+
+
+class FakeHypothesis:
+
+	def __init__(self, text: str):
+		self.hypstr = text
+		self.prob = -1
+
+
+class FakeDecoder:
+	"""
+	In speech for the first two batches of an utterance, silence afterwards
+	"""
+
+	@staticmethod
+	def default_config():
+		return MagicMock()
+
+
+	def __init__(self, config):
+		self._batches = 0
+
+
+	def start_utt(self):
+		self._batches = 0
+
+
+	def end_utt(self):
+		pass
+
+
+	def process_raw(self, data, noSearch, fullUtt):
+		self._batches += 1
+
+
+	def get_in_speech(self):
+		return self._batches <= 2
+
+
+	def hyp(self):
+		return FakeHypothesis(f'batch {self._batches}') if self._batches else None
+
+
+class FailingDecoder(FakeDecoder):
+
+	def __init__(self, config):
+		super().__init__(config)
+		raise RuntimeError('no model')
+
+
+class FakeWorker:
+	"""
+	A decoder that is always busy, replies only arrive when blocking on them
+	"""
+
+	def __init__(self):
+		self.calls = list()
+		self._replies = list()
+
+
+	def send(self, message):
+		self.calls.append(('send', message if isinstance(message, str) else len(message)))
+		if message == 'end':
+			self._replies.append((False, 'done', -1))
+		elif message != 'start':
+			self._replies.append((True, None, 0))
+
+
+	def receive(self, timeout):
+		self.calls.append(('receive',))
+		return self._replies.pop(0)
+
+
+	def poll(self):
+		self.calls.append(('poll',))
+		return None
+
+
+class LaggingWorker(FakeWorker):
+	"""
+	A decoder that answers a batch shortly after it is sent, in speech for the first batch only
+	"""
+
+	def send(self, message):
+		self.calls.append(('send', message if isinstance(message, str) else len(message)))
+		if message == 'end':
+			self._replies.append([(False, 'done', -1), True])
+		elif message != 'start':
+			batches = len([call for call in self.calls if call[0] == 'send' and call[1] not in {'start', 'end'}])
+			self._replies.append([(batches == 1, None, 0), False])
+
+
+	def receive(self, timeout):
+		self.calls.append(('receive',))
+		return self._replies.pop(0)[0]
+
+
+	def poll(self):
+		self.calls.append(('poll',))
+		if not self._replies:
+			return None
+
+		# The oldest batch is decoded by the time of the next poll
+		if not self._replies[0][1]:
+			self._replies[0][1] = True
+			return None
+
+		return self._replies.pop(0)[0]
+
+
+@mock.patch('core.asr.model.PocketSphinxAsr.Decoder', FakeDecoder, create=True)
+class TestPocketSphinxAsr(unittest.TestCase):
+
+	def test_workerReplies(self):
+		worker = DecoderWorker(config={'-hmm': 'model'})
+		self.assertTrue(worker.isAlive)
+
+		worker.send('start')
+		worker.send(b'audio')
+		self.assertEqual(worker.receive(timeout=5), (True, 'batch 1', -1))
+		worker.send(b'audio')
+		worker.send(b'audio')
+		self.assertEqual(worker.receive(timeout=5), (True, 'batch 2', -1))
+		self.assertEqual(worker.receive(timeout=5), (False, 'batch 3', -1))
+		worker.send('end')
+		self.assertEqual(worker.receive(timeout=5), (False, 'batch 3', -1))
+
+		worker.stop()
+		self.assertFalse(worker.isAlive)
+
+
+	def test_workerStartFailure(self):
+		with mock.patch('core.asr.model.PocketSphinxAsr.Decoder', FailingDecoder):
+			with self.assertRaises(DecoderStartFailed):
+				DecoderWorker(config={'-hmm': 'model'})
+
+			# So that starting the Asr fails and the Asr manager falls back
+			with self.assertRaises(DecoderStartFailed):
+				DecoderWorkerPool(config={'-hmm': 'model'}, maxWorkers=1)
+
+
+	def test_endUtteranceSkipsPending(self):
+		asr = PocketSphinxAsr()
+		worker = DecoderWorker(config={'-hmm': 'model'})
+
+		worker.send('start')
+		worker.send(b'audio')
+		worker.send(b'audio')
+		self.assertEqual(asr._endUtterance(worker, pending=2), ('batch 2', -1))
+
+		# Nothing left behind for the next session
+		self.assertIsNone(worker.poll())
+		worker.stop()
+
+
+	def test_discardDeadWorker(self):
+		pool = DecoderWorkerPool(config={'-hmm': 'model'}, maxWorkers=1)
+		worker = pool.acquire(timeout=1)
+
+		# The pool is full and its only worker is checked out
+		with self.assertRaises(queue.Empty):
+			pool.acquire(timeout=0.1)
+
+		worker._worker.terminate()
+		worker._worker.join()
+		pool.discard(worker)
+
+		newWorker = pool.acquire(timeout=1)
+		self.assertIsNot(newWorker, worker)
+		self.assertTrue(newWorker.isAlive)
+		pool.stop()
+		pool.release(newWorker)
+
+
+	@mock.patch('core.asr.model.PocketSphinxAsr.availableCpus', return_value=[2, 5])
+	def test_workerCpus(self, mock_cpus):
+		# Never more workers than usable cpus
+		pool = DecoderWorkerPool(config={'-hmm': 'model'}, maxWorkers=4)
+		first = pool.acquire(timeout=1)
+		second = pool.acquire(timeout=1)
+		self.assertEqual((first.cpu, second.cpu), (2, 5))
+		with self.assertRaises(queue.Empty):
+			pool.acquire(timeout=0.1)
+
+		# A discarded worker gives its cpu back to its replacement
+		pool.discard(first)
+		replacement = pool.acquire(timeout=1)
+		self.assertEqual(replacement.cpu, 2)
+
+		pool.stop()
+		pool.release(second)
+		pool.release(replacement)
+
+
+	def test_releaseToStoppedPool(self):
+		pool = DecoderWorkerPool(config={'-hmm': 'model'}, maxWorkers=1)
+		worker = pool.acquire(timeout=1)
+
+		pool.stop()
+		pool.release(worker)
+
+		self.assertFalse(worker.isAlive)
+		with self.assertRaises(queue.Empty):
+			pool.acquire(timeout=0.1)
+
+
+	def test_acquireFromStoppedPool(self):
+		pool = DecoderWorkerPool(config={'-hmm': 'model'}, maxWorkers=2)
+		worker = pool.acquire(timeout=1)
+		pool.stop()
+
+		# A stopped pool does not spawn a decoder just to stop it on release
+		with mock.patch('core.asr.model.PocketSphinxAsr.DecoderWorker') as mock_worker:
+			with self.assertRaises(queue.Empty):
+				pool.acquire(timeout=1)
+			mock_worker.assert_not_called()
+
+		pool.release(worker)
+
+
+	def test_freeResources(self):
+		pool = DecoderWorkerPool(config={'-hmm': 'model'}, maxWorkers=1)
+		worker = pool.acquire(timeout=1)
+		pool.release(worker)
+		PocketSphinxAsr._pool = pool
+
+		PocketSphinxAsr().freeResources()
+
+		self.assertIsNone(PocketSphinxAsr._pool)
+		self.assertFalse(worker.isAlive)
+
+
+	def test_pendingBatches(self):
+		asr = PocketSphinxAsr()
+		asr.partialTextCaptured = MagicMock()
+		worker = FakeWorker()
+
+		chunks = [b'\x00' * PocketSphinxAsr.BATCH_SIZE] * 3
+		result = asr._decode(worker, MagicMock(), chunks, Stopwatch())
+
+		# One batch is left in flight, capture only blocks on the decoder once a second one is sent
+		self.assertEqual(worker.calls, [
+			('send', 'start'),
+			('send', PocketSphinxAsr.BATCH_SIZE),
+			('poll',),
+			('send', PocketSphinxAsr.BATCH_SIZE),
+			('receive',),
+			('poll',),
+			('send', PocketSphinxAsr.BATCH_SIZE),
+			('receive',),
+			('poll',),
+			('send', 'end'),
+			('receive',),
+			('receive',)
+		])
+
+		# Speech never ended, the utterance is closed but nothing is returned
+		self.assertIsNone(result)
+
+
+
+	def test_speechEndHandledBeforeNextBatch(self):
+		asr = PocketSphinxAsr()
+		asr.partialTextCaptured = MagicMock()
+		worker = LaggingWorker()
+
+		# Two full batches, then audio trickling in smaller chunks
+		chunks = [b'\x00' * PocketSphinxAsr.BATCH_SIZE] * 2 + [b'\x00' * 1024] * 16
+		result = asr._decode(worker, MagicMock(), chunks, Stopwatch())
+
+		# The end of speech answer for the second batch is read with the next chunk, no third batch is sent
+		self.assertEqual(worker.calls, [
+			('send', 'start'),
+			('send', PocketSphinxAsr.BATCH_SIZE),
+			('poll',),
+			('send', PocketSphinxAsr.BATCH_SIZE),
+			('receive',),
+			('poll',),
+			('poll',),
+			('send', 'end'),
+			('receive',)
+		])
+		self.assertEqual(result, ('done', -1))
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+from unittest import mock
+from unittest.mock import MagicMock, PropertyMock
+
+from core.base.ConfigManager import ConfigManager
+from core.base.model.TomlFile import Section
+
+
+class TestConfigManager(unittest.TestCase):
+
+	@mock.patch('core.base.ConfigManager.ConfigManager.loadSnipsConfigurations')
+	@mock.patch('core.base.ConfigManager.ConfigManager._loadCheckAndUpdateAliceConfigFile')
+	@mock.patch('core.base.ConfigManager.ConfigManager.Commons', new_callable=PropertyMock)
+	def test_updateSnipsConfigurations(self, mock_commons, mock_aliceConfigs, mock_snipsConfigs):
+		common_mock = MagicMock()
+		common_mock.getFunctionCaller.return_value = 'ConfigManager'
+		mock_commons.return_value = common_mock
+
+		section = Section('snips-common')
+		section['mqtt'] = 'localhost:1883'
+		section['mqtt_username'] = ''
+		snipsConfigs = MagicMock()
+		snipsConfigs.__getitem__.return_value = section
+		mock_aliceConfigs.return_value = dict()
+		mock_snipsConfigs.return_value = snipsConfigs
+
+		configManager = ConfigManager()
+
+		# all keys are set with a single dump and a single restart
+		configManager.updateSnipsConfigurations(parent='snips-common', values={'mqtt': 'alice:1883', 'mqtt_username': 'alice'}, restartSnips=True)
+		self.assertEqual(section['mqtt'], 'alice:1883')
+		self.assertEqual(section['mqtt_username'], 'alice')
+		snipsConfigs.dump.assert_called_once()
+		common_mock.runRootSystemCommand.assert_called_once_with(['systemctl', 'restart', 'snips-nlu'])
+		snipsConfigs.reset_mock()
+		common_mock.reset_mock()
+
+		# missing keys are skipped when they should not be created, the existing ones are still set
+		configManager.updateSnipsConfigurations(parent='snips-common', values={'mqtt': 'other:1883', 'mqtt_password': 'secret'}, createIfNotExist=False)
+		self.assertEqual(section['mqtt'], 'other:1883')
+		self.assertNotIn('mqtt_password', section)
+		snipsConfigs.dump.assert_called_once()
+		common_mock.runRootSystemCommand.assert_not_called()
+		snipsConfigs.reset_mock()
+		common_mock.reset_mock()
+
+		# nothing changed, no dump and no restart
+		configManager.updateSnipsConfigurations(parent='snips-common', values={'mqtt_password': 'secret'}, restartSnips=True, createIfNotExist=False)
+		self.assertNotIn('mqtt_password', section)
+		snipsConfigs.dump.assert_not_called()
+		common_mock.runRootSystemCommand.assert_not_called()
+
+		# missing keys are created by default
+		configManager.updateSnipsConfigurations(parent='snips-common', values={'mqtt_password': 'secret'})
+		self.assertEqual(section['mqtt_password'], 'secret')
+		snipsConfigs.dump.assert_called_once()
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+from unittest import mock
+from unittest.mock import MagicMock, PropertyMock
+
+from core.base.SkillStoreManager import SkillStoreManager
+
+
+class TestSkillStoreManager(unittest.TestCase):
+
+	@mock.patch('core.base.SkillStoreManager.requests')
+	@mock.patch('core.base.SkillStoreManager.SkillStoreManager.ConfigManager', new_callable=PropertyMock)
+	@mock.patch('core.base.SkillStoreManager.SkillStoreManager.Commons', new_callable=PropertyMock)
+	def test_refreshStoreData(self, mock_commons, mock_config, mock_requests):
+		common_mock = MagicMock()
+		common_mock.getFunctionCaller.return_value = 'SkillStoreManager'
+		mock_commons.return_value = common_mock
+
+		config_mock = MagicMock()
+		config_mock.getAliceConfigByName.return_value = 'master'
+		mock_config.return_value = config_mock
+
+		mock_session = mock_requests.Session.return_value
+		skillStoreManager = SkillStoreManager()
+
+		# first download, no etag to send yet
+		mock_response = MagicMock(status_code=200, headers={'ETag': '"etag1"'})
+		mock_response.json.return_value = {'skill': 'master data'}
+		mock_session.get.return_value = mock_response
+
+		skillStoreManager.refreshStoreData()
+		mock_session.get.assert_called_once_with(url='https://skills.projectalice.io/assets/store/master.json', headers=None)
+		self.assertEqual(skillStoreManager.skillStoreData, {'skill': 'master data'})
+		mock_session.reset_mock()
+
+		# same channel, the etag is sent and a 304 keeps the data without parsing anything
+		mock_response = MagicMock(status_code=304, headers=dict())
+		mock_session.get.return_value = mock_response
+
+		skillStoreManager.refreshStoreData()
+		mock_session.get.assert_called_once_with(url='https://skills.projectalice.io/assets/store/master.json', headers={'If-None-Match': '"etag1"'})
+		mock_response.json.assert_not_called()
+		self.assertEqual(skillStoreManager.skillStoreData, {'skill': 'master data'})
+		mock_session.reset_mock()
+
+		# channel changed, the etag of the other channel is not sent
+		config_mock.getAliceConfigByName.return_value = 'beta'
+		mock_response = MagicMock(status_code=200, headers=dict())
+		mock_response.json.return_value = {'skill': 'beta data'}
+		mock_session.get.return_value = mock_response
+
+		skillStoreManager.refreshStoreData()
+		mock_session.get.assert_called_once_with(url='https://skills.projectalice.io/assets/store/beta.json', headers=None)
+		self.assertEqual(skillStoreManager.skillStoreData, {'skill': 'beta data'})
+		mock_session.reset_mock()
+
+		# the new channel did not send any etag, the old one is dropped
+		skillStoreManager.refreshStoreData()
+		mock_session.get.assert_called_once_with(url='https://skills.projectalice.io/assets/store/beta.json', headers=None)
+
+
+if __name__ == "__main__":
+	unittest.main()